@@ -1,109 +1,130 @@
 # %%
+from typing import Optional
+
 with open("inputs/test.txt") as file:
     contents = file.read()
 
 
+# Directions as indexes into (N, E, S, W), the opposite is `(d + 2) % 4`.
+N, E, S, W = range(4)
+TILES = {
+    "|": (N, S),
+    "-": (E, W),
+    "L": (N, E),
+    "J": (N, W),
+    "7": (S, W),
+    "F": (S, E),
+}
+DX, DY = (0, 1, 0, -1), (-1, 0, 1, 0)
+# Bitmask of the openings of each tile and the tile for each bitmask.
+OPENINGS = [0] * 256
+SHAPES: dict[int, str] = {}
+for tile, (dir_1, dir_2) in TILES.items():
+    OPENINGS[ord(tile)] = (1 << dir_1) | (1 << dir_2)
+    SHAPES[OPENINGS[ord(tile)]] = tile
+# Outgoing direction when entering a tile moving in direction `d`, else -1.
+TURNS = [-1] * (256 * 4)
+for tile, (dir_1, dir_2) in TILES.items():
+    TURNS[ord(tile) * 4 + (dir_1 + 2) % 4] = dir_2
+    TURNS[ord(tile) * 4 + (dir_2 + 2) % 4] = dir_1
+
+
 class Maze:
     def __init__(self, lines: str):
-        self.tiles: list[list[str]] = [
-            [self._create_tile(tile, (i, j)) for i, tile in enumerate(line)]
-            for j, line in enumerate(lines.splitlines())
-        ]
-
-        if not hasattr(self, "start"):
+        rows = lines.splitlines()
+        if len({len(row) for row in rows}) != 1:
+            raise ValueError("Rows must be of equal length.")
+
+        self.width, self.height = len(rows[0]), len(rows)
+        # Newlines act as sentinels around the grid, including a padding row
+        # above and below, so moves never leave the buffer.
+        self.stride = self.width + 1
+        padding = b"\n" * self.stride
+        self.tiles = bytearray(
+            padding + "\n".join(rows).encode() + b"\n" + padding
+        )
+        self.offsets = (-self.stride, 1, self.stride, -1)
+
+        if (index := self.tiles.find(b"S")) == -1:
             raise ValueError("Missing start.")
 
-    def _create_tile(self, value: str, position: tuple[int, int]):
-        if value == "S":
-            self.start: tuple[int, int] = position
-        return value
+        self._start = index
+        self.start: tuple[int, int] = (
+            index % self.stride,
+            index // self.stride - 1,
+        )
 
     def __getitem__(self, position: tuple[int, int]) -> str:
-        return self.tiles[position[1]][position[0]]
-
-    def _directions(
-        self,
-        tile: str,
-    ) -> tuple[tuple[int, int], tuple[int, int]]:
-        match tile:
-            case "|":
-                return (0, 1), (0, -1)
-            case "-":
-                return (-1, 0), (1, 0)
-            case "L":
-                return (0, -1), (1, 0)
-            case "J":
-                return (0, -1), (-1, 0)
-            case "7":
-                return (0, 1), (-1, 0)
-            case "F":
-                return (0, 1), (1, 0)
-            case _:
-                return (0, 0), (0, 0)
-
-    def explore(self, tile: str):
-        if not self._valid_tile(tile, self.start):
+        return chr(self.tiles[(position[1] + 1) * self.stride + position[0]])
+
+    def infer_start(self) -> str:
+        """Infers the shape of the start tile from its four neighbours."""
+        openings = 0
+        for direction, offset in enumerate(self.offsets):
+            other_tile = self.tiles[self._start + offset]
+            if OPENINGS[other_tile] & (1 << (direction + 2) % 4):
+                openings |= 1 << direction
+
+        if (tile := SHAPES.get(openings)) is None:
             raise ValueError(
                 "Invalid starting tile. "
                 "Must be connected to exactly two other tiles."
             )
+        return tile
 
-        direction = self._directions(tile)[0]
-        position = self._move(self.start, direction)
+    def explore(self, tile: Optional[str] = None) -> int:
+        return self.traverse(tile)[0]
 
-        steps = 1
-        inv_direction = self._invert_direction(direction)
-        while position != self.start:
-            dir_1, dir_2 = self._directions(self[position])
-            direction = dir_1 if dir_1 != inv_direction else dir_2
-            inv_direction = self._invert_direction(direction)
+    def traverse(self, tile: Optional[str] = None) -> tuple[int, int]:
+        """Walks the loop once and returns its length and enclosed tiles.
 
-            if not self._valid_move(position, direction):
-                raise ValueError("Not a loop.")
+        The area of the loop polygon is accumulated with the shoelace
+        formula while walking, the number of enclosed tiles then follows
+        from Pick's theorem.
+        """
+        if tile is None:
+            tile = self.infer_start()
+        elif tile not in TILES or not self._valid_tile(tile):
+            raise ValueError(
+                "Invalid starting tile. "
+                "Must be connected to exactly two other tiles."
+            )
 
-            position = self._move(position, direction)
-            steps += 1
+        tiles, offsets, start = self.tiles, self.offsets, self._start
+        direction = TILES[tile][0]
+        position = start + offsets[direction]
 
-        return steps
+        x = self.start[0]
+        area = x * DY[direction]
+        x += DX[direction]
+
+        steps = 1
+        while position != start:
+            direction = TURNS[tiles[position] * 4 + direction]
+            if direction == -1:
+                raise ValueError("Not a loop.")
 
-    def _invert_direction(self, direction: tuple[int, int]) -> tuple[int, int]:
-        return (-1 * direction[0], -1 * direction[1])
+            position += offsets[direction]
+            area += x * DY[direction]
+            x += DX[direction]
+            steps += 1
 
-    def _move(
-        self,
-        position: tuple[int, int],
-        direction: tuple[int, int],
-    ) -> tuple[int, int]:
-        return (position[0] + direction[0], position[1] + direction[1])
+        return steps, abs(area) - steps // 2 + 1
 
-    def _valid_tile(self, tile: str, position: tuple[int, int]) -> bool:
-        for direction in self._directions(tile):
-            other_tile = self[self._move(position, direction)]
-            inv_direction = self._invert_direction(direction)
-            if inv_direction not in self._directions(other_tile):
+    def _valid_tile(self, tile: str) -> bool:
+        for direction in TILES[tile]:
+            other_tile = self.tiles[self._start + self.offsets[direction]]
+            if not OPENINGS[other_tile] & (1 << (direction + 2) % 4):
                 return False
         return True
 
-    def _valid_move(
-        self,
-        position: tuple[int, int],
-        direction: tuple[int, int],
-    ) -> bool:
-        tile = self[self._move(position, direction)]
-        if tile == "S":
-            return True
-
-        if direction == (0, 0):
-            return False
-
-        return self._invert_direction(direction) in self._directions(tile)
-
 
 maze = Maze(contents)
-for start_tile in ["|", "-", "L", "J", "7", "F"]:
-    try:
-        steps = maze.explore(start_tile)
-        print(f'Took {steps} steps with tile "{start_tile}".')
-        print("Answer:", int(steps / 2))
-    except ValueError:
-        print(f"Invalid tile {start_tile}.")
+start_tile = maze.infer_start()
+steps, enclosed = maze.traverse(start_tile)
+print("Part 1")
+print(f'Took {steps} steps with tile "{start_tile}".')
+print("Answer:", steps // 2)
+
+print("Part 2")
+print("Answer:", enclosed)
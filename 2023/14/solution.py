@@ -1,5 +1,5 @@
 # %%
-from typing import Optional
+from typing import Optional, Hashable
 from enum import Enum
 
 with open("inputs/test.txt") as file:
@@ -13,7 +13,50 @@ class Direction(Enum):
     E = (1, 0)
 
 
-class Field:
+class SpinningField:
+    """Spin cycle API shared by the field backends.
+
+    Backends implement `tilt`, `state` and `calculate_load`.
+    """
+
+    def tilt(self, direction: Direction):
+        raise NotImplementedError()
+
+    def state(self) -> Hashable:
+        raise NotImplementedError()
+
+    def calculate_load(self) -> int:
+        raise NotImplementedError()
+
+    def spin(self):
+        for direction in Direction:
+            self.tilt(direction)
+
+    def load_after(self, n_cycles: int) -> int:
+        """Calculates the load after `n_cycles` spin cycles.
+
+        The field is spun until a state repeats, the remaining cycles are
+        skipped using the offset and period of the detected cycle.
+        """
+        seen: dict[Hashable, int] = {}
+        loads: list[int] = []
+        for i in range(n_cycles):
+            state = self.state()
+            if (start := seen.get(state)) is not None:
+                period = i - start
+                return loads[start + (n_cycles - start) % period]
+
+            seen[state] = i
+            loads.append(self.calculate_load())
+            self.spin()
+
+        return self.calculate_load()
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class Field(SpinningField):
     def __init__(self, field: list[str]) -> None:
         self.field = [[item for item in row] for row in field]
 
@@ -67,6 +110,9 @@ class Field:
             position[1] + direction.value[1],
         )
 
+    def state(self) -> Hashable:
+        return str(self)
+
     def calculate_load(self):
         load = 0
         for j, row in enumerate(self.field[::-1], 1):
@@ -83,19 +129,118 @@ class Field:
         return self.__str__()
 
 
+class BitField(SpinningField):
+    """Field storing the rocks as integer bitmasks.
+
+    Round rocks are kept either per row (bit `i` is column `i`) or per column
+    (bit `j` is row `j`), whichever the last tilt needed. A tilt packs the
+    rocks of each segment between cube rocks in a single step.
+    """
+
+    def __init__(self, field: list[str]) -> None:
+        self.height, self.width = len(field), len(field[0])
+        self.rounds = [self._mask(row, "O") for row in field]
+        self.by_rows = True
+
+        cubes = [self._mask(row, "#") for row in field]
+        self.row_segments = [
+            self._segments(mask, self.width) for mask in cubes
+        ]
+        self.col_segments = [
+            self._segments(mask, self.height)
+            for mask in self._transpose(cubes, self.width)
+        ]
+        self.cubes = cubes
+
+    @staticmethod
+    def _mask(row: str, item: str) -> int:
+        return sum(1 << i for i, value in enumerate(row) if value == item)
+
+    @staticmethod
+    def _segments(cubes: int, length: int) -> list[tuple[int, int, int]]:
+        segments, start = [], 0
+        for i in range(length + 1):
+            if i < length and not (cubes >> i) & 1:
+                continue
+
+            if i > start:
+                mask = ((1 << (i - start)) - 1) << start
+                segments.append((start, i, mask))
+            start = i + 1
+
+        return segments
+
+    @staticmethod
+    def _transpose(masks: list[int], length: int) -> list[int]:
+        transposed = [0] * length
+        for j, mask in enumerate(masks):
+            while mask:
+                low = mask & -mask
+                transposed[low.bit_length() - 1] |= 1 << j
+                mask ^= low
+        return transposed
+
+    def _rows(self) -> list[int]:
+        if not self.by_rows:
+            self.rounds = self._transpose(self.rounds, self.height)
+            self.by_rows = True
+        return self.rounds
+
+    def _cols(self) -> list[int]:
+        if self.by_rows:
+            self.rounds = self._transpose(self.rounds, self.width)
+            self.by_rows = False
+        return self.rounds
+
+    def __getitem__(self, position: tuple[int, int]) -> str:
+        i, j = position
+        if (self.cubes[j] >> i) & 1:
+            return "#"
+        return "O" if (self._rows()[j] >> i) & 1 else "."
+
+    def __setitem__(self, position: tuple[int, int], value: str):
+        i, j = position
+        rows = self._rows()
+        rows[j] = rows[j] | (1 << i) if value == "O" else rows[j] & ~(1 << i)
+
+    def tilt(self, direction: Direction):
+        match direction:
+            case Direction.N | Direction.S:
+                masks, segments = self._cols(), self.col_segments
+            case Direction.W | Direction.E:
+                masks, segments = self._rows(), self.row_segments
+
+        to_start = direction in [Direction.N, Direction.W]
+        for k, mask in enumerate(masks):
+            tilted = 0
+            for start, stop, segment in segments[k]:
+                if not (n := (mask & segment).bit_count()):
+                    continue
+                tilted |= ((1 << n) - 1) << (start if to_start else stop - n)
+            masks[k] = tilted
+
+    def state(self) -> Hashable:
+        return tuple(self._rows())
+
+    def calculate_load(self):
+        return sum(
+            (self.height - j) * row.bit_count()
+            for j, row in enumerate(self._rows())
+        )
+
+    def __str__(self) -> str:
+        return "\n".join(
+            "".join(self[i, j] for i in range(self.width))
+            for j in range(self.height)
+        )
+
+
 field = Field(raw_field)
 
 print("Part 1")
 field.tilt(Direction.N)
 print("Answer:", field.calculate_load())
 
-field = Field(raw_field)
-i = 0
-max_iter = 100000
-while i <= max_iter:
-    for direction in Direction:
-        field.tilt(direction)
-    if (i % 1000) == 0:
-        print(i, field.calculate_load())
-    i += 1
-
+print("Part 2")
+field = BitField(raw_field)
+print("Answer:", field.load_after(1_000_000_000))
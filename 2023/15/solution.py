@@ -1,53 +1,88 @@
 # %%
-from collections import defaultdict
+from functools import lru_cache
+from typing import Iterator, TextIO
 
 with open("inputs/test.txt") as file:
     contents = file.read()
-sequences = contents.split(",")
 
+# HASH_TABLE[value << 8 | char] is the HASH value after processing char.
+HASH_TABLE = bytes(
+    (value + char) * 17 % 256 for value in range(256) for char in range(256)
+)
 
-def hash(seq: str) -> int:
+
+def hash_bytes(data: bytes | memoryview) -> int:
     current_value = 0
-    for char in seq:
-        current_value += ord(char)
-        current_value *= 17
-        current_value = current_value % 256
+    for char in data:
+        current_value = HASH_TABLE[current_value << 8 | char]
     return current_value
 
 
-result = sum([hash(seq) for seq in sequences])
+def hash_steps(data: bytes | memoryview) -> int:
+    """Sums the HASH of all comma-separated steps in a single pass."""
+    comma, newline = ord(","), ord("\n")
+    total = current_value = 0
+    for char in data:
+        if char == comma:
+            total += current_value
+            current_value = 0
+        elif char != newline:
+            current_value = HASH_TABLE[current_value << 8 | char]
+    return total + current_value
+
+
+@lru_cache(maxsize=None)
+def hash_label(label: str) -> int:
+    return hash_bytes(label.encode())
+
+
+result = hash_steps(contents.encode())
 
 print("Part 1")
 print("Answer:", result)
 
-labels = defaultdict(list)
-focal_lengths = defaultdict(list)
 
-for seq in sequences:
-    operator = '-' if '-' in seq else '='
-    label = seq.split(operator)[0]
-    box_number = hash(label)
+def read_steps(file: TextIO, chunk_size: int = 1 << 16) -> Iterator[str]:
+    """Yields the comma-separated steps of a file without reading it whole."""
+    rest = ""
+    while chunk := file.read(chunk_size):
+        *steps, rest = (rest + chunk).split(",")
+        yield from (step.strip("\n") for step in steps)
+
+    if rest := rest.strip("\n"):
+        yield rest
 
-    match operator:
-        case "=":
-            focal = int(seq.split(operator)[1])
 
-            if label in labels[box_number]:
-                index = labels[box_number].index(label)
-                focal_lengths[box_number][index] = focal
-            else:
-                labels[box_number].append(label)
-                focal_lengths[box_number].append(focal)
-        case "-":
-            if label not in labels[box_number]:
-                continue
+class Boxes:
+    """The 256 boxes, each an insertion-ordered dict from label to focal.
 
-            index = labels[box_number].index(label)
-            labels[box_number].pop(index)
-            focal_lengths[box_number].pop(index)
+    Replacing a lens keeps its slot and removing one keeps the order of the
+    others, so every operation is O(1).
+    """
 
+    def __init__(self) -> None:
+        self.boxes: list[dict[str, int]] = [{} for _ in range(256)]
 
-def calculate_focusing_power(focal_lengths: dict[int, list[str]]):
+    def apply(self, seq: str):
+        operator = '-' if '-' in seq else '='
+        label, focal = seq.split(operator)
+        box = self.boxes[hash_label(label)]
+
+        match operator:
+            case "=":
+                box[label] = int(focal)
+            case "-":
+                box.pop(label, None)
+
+    def focal_lengths(self) -> dict[int, list[int]]:
+        return {
+            box_number: list(box.values())
+            for box_number, box in enumerate(self.boxes)
+            if box
+        }
+
+
+def calculate_focusing_power(focal_lengths: dict[int, list[int]]):
     return sum(
         [
             (box_number + 1) * i * length
@@ -57,7 +92,12 @@ def calculate_focusing_power(focal_lengths: dict[int, list[str]]):
     )
 
 
-fp = calculate_focusing_power(dict(focal_lengths))
+boxes = Boxes()
+with open("inputs/test.txt") as file:
+    for seq in read_steps(file):
+        boxes.apply(seq)
+
+fp = calculate_focusing_power(boxes.focal_lengths())
 
 print("Part 2")
 print("Answer:", fp)
@@ -1,8 +1,13 @@
 # %%
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import operator
 from functools import reduce
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Iterable
+import re
 
 
 @dataclass
@@ -49,19 +54,122 @@ class Game:
         return reduce(operator.mul, self.fewest().values(), 1)
 
 
-with open("inputs/test.txt", "r") as file:
-    games = [Game.parse(line) for line in file.readlines()]
+GAME_PATTERN = re.compile(r"(\d+) (red|green|blue)")
+
+
+@dataclass
+class GameColumns:
+    """Per-game maximum count of every color, stored as compact columns."""
+
+    ids: array = field(default_factory=lambda: array("I"))
+    red: array = field(default_factory=lambda: array("I"))
+    green: array = field(default_factory=lambda: array("I"))
+    blue: array = field(default_factory=lambda: array("I"))
+
+    def append(self, line: str):
+        id, draws = line.split(":")
+        maxima = {"red": 0, "green": 0, "blue": 0}
+        for count, color in GAME_PATTERN.findall(draws):
+            if (count := int(count)) > maxima[color]:
+                maxima[color] = count
+
+        self.ids.append(int(id.split(" ")[1]))
+        self.red.append(maxima["red"])
+        self.green.append(maxima["green"])
+        self.blue.append(maxima["blue"])
+
+    def valid_ids(self, red: int, blue: int, green: int) -> int:
+        return sum(
+            id
+            for id, r, g, b in zip(self.ids, self.red, self.green, self.blue)
+            if r <= red and g <= green and b <= blue
+        )
+
+    def fewest_powers(self) -> int:
+        return sum(
+            r * g * b for r, g, b in zip(self.red, self.green, self.blue)
+        )
 
-with open("inputs/val.txt", "r") as file:
-    val_games = [Game.parse(line) for line in file.readlines()]
+    @classmethod
+    def parse(cls, lines: Iterable[str]) -> "GameColumns":
+        columns = GameColumns()
+        for line in lines:
+            if line.strip():
+                columns.append(line)
+        return columns
+
+
+class BagIndex:
+    """Dominance index answering which games are possible for many bags.
+
+    Games are sorted by red and covered by the nodes of a static Fenwick
+    tree. Each node sorts its games by green and covers them with a second
+    static Fenwick tree whose nodes hold sorted blue maxima with prefix sums
+    of the ids. The index takes O(n log(n)^2) memory, built once, and a bag
+    is answered in O(log(n)^3) without modifying it.
+    """
+
+    def __init__(self, columns: GameColumns):
+        games = sorted(
+            zip(columns.red, columns.green, columns.blue, columns.ids)
+        )
+        self.reds = [red for red, *_ in games]
+        self.nodes = [([], [])] + [
+            self._build_node(games[i - (i & -i) : i])
+            for i in range(1, len(games) + 1)
+        ]
+
+    @staticmethod
+    def _build_node(
+        games: list[tuple[int, int, int, int]],
+    ) -> tuple[list[int], list[tuple[list[int], list[int]]]]:
+        games = sorted(games, key=lambda game: game[1])
+        greens = [green for _, green, _, _ in games]
+
+        blocks = [([], [0])]
+        for j in range(1, len(games) + 1):
+            block = sorted(
+                (blue, id) for *_, blue, id in games[j - (j & -j) : j]
+            )
+            blues = [blue for blue, _ in block]
+            sums = list(accumulate((id for _, id in block), initial=0))
+            blocks.append((blues, sums))
+
+        return greens, blocks
+
+    def query(self, bags: Iterable[tuple[int, int, int]]) -> list[int]:
+        """Returns the sum of valid game ids for every (red, green, blue)."""
+        return [self.valid_ids(red, blue, green) for red, green, blue in bags]
+
+    def valid_ids(self, red: int, blue: int, green: int) -> int:
+        total = 0
+        i = bisect_right(self.reds, red)
+        while i > 0:
+            greens, blocks = self.nodes[i]
+            j = bisect_right(greens, green)
+            while j > 0:
+                blues, sums = blocks[j]
+                total += sums[bisect_right(blues, blue)]
+                j -= j & -j
+            i -= i & -i
+        return total
+
+
+with open("inputs/test.txt", "r") as file:
+    columns = GameColumns.parse(file)
 
 # Part 1
-ids = [game.id for game in games if game.is_valid(red=12, green=13, blue=14)]
 print("Part 1")
-print("Answer:", sum(ids))
+print("Answer:", columns.valid_ids(red=12, green=13, blue=14))
 print()
 
 # Part 2
-powers = [game.fewest_power() for game in games]
 print("Part 2")
-print("Answer:", sum(powers))
+print("Answer:", columns.fewest_powers())
+print()
+
+# Bag queries
+index = BagIndex(columns)
+bags = [(12, 13, 14), (20, 20, 20)]
+print("Bags")
+print("Answers:", index.query(bags))
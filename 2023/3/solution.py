@@ -1,11 +1,12 @@
 # %%
-from typing import Optional, Iterator, Any
+from typing import Optional, Iterator, Iterable, Any
 from enum import StrEnum
 from dataclasses import dataclass
 from functools import cached_property
 import re
 from functools import reduce
 import operator
+from collections import defaultdict
 
 
 class Direction(StrEnum):
@@ -172,30 +173,147 @@ class Symbol:
         return Symbol(self.cell, [*self.parts, *other.parts])
 
 
+@dataclass
+class SymbolIndex:
+    """Index from coordinates to the symbols adjacent to them.
+
+    Built in a single pass over the rows of a matrix, so parts and gears
+    are resolved with set lookups instead of rescanning all directions.
+    """
+
+    matrix: Matrix
+    neighbors: dict[tuple[int, int], set[tuple[int, int]]]
+
+    OFFSETS = (
+        (0, 1),
+        (1, 0),
+        (0, -1),
+        (-1, 0),
+        (1, 1),
+        (1, -1),
+        (-1, -1),
+        (-1, 1),
+    )
+
+    def symbols(self, i: int, start: int, stop: int) -> set[tuple[int, int]]:
+        """Returns the symbols adjacent to the cells [start, stop) of row i."""
+        symbols = set()
+        for j in range(start, stop):
+            if (adjacent := self.neighbors.get((i, j))) is not None:
+                symbols |= adjacent
+        return symbols
+
+    def parts(self) -> Iterator[tuple[int, set[tuple[int, int]]]]:
+        """Yields every part number together with its adjacent symbols."""
+        for i, row in enumerate(self.matrix.rows):
+            for match in re.finditer(r"\d+", row):
+                yield int(match.group()), self.symbols(i, *match.span())
+
+    def parts_by_symbol(self) -> dict[tuple[int, int], list[int]]:
+        parts_by_symbol = defaultdict(list)
+        for number, symbols in self.parts():
+            for symbol in symbols:
+                parts_by_symbol[symbol].append(number)
+        return dict(parts_by_symbol)
+
+    def gear_ratios(self) -> Iterator[int]:
+        for (i, j), numbers in self.parts_by_symbol().items():
+            if self.matrix.rows[i][j] == "*" and len(numbers) == 2:
+                yield numbers[0] * numbers[1]
+
+    @classmethod
+    def build(cls, matrix: Matrix) -> "SymbolIndex":
+        neighbors = defaultdict(set)
+        for i, row in enumerate(matrix.rows):
+            for j, value in enumerate(row):
+                if value.isnumeric() or value == ".":
+                    continue
+
+                for di, dj in cls.OFFSETS:
+                    if matrix.is_valid(i + di, j + dj):
+                        neighbors[i + di, j + dj].add((i, j))
+
+        return SymbolIndex(matrix, dict(neighbors))
+
+
+def _is_symbol(value: str) -> bool:
+    return not value.isnumeric() and value != "."
+
+
+Row = tuple[str, list[tuple[int, int, int]]]
+
+
+def stream_schematic(lines: Iterable[str]) -> Iterator[tuple[str, int]]:
+    """Yields ("part", number) and ("gear", ratio) while reading lines.
+
+    Only the previous, current and next row are kept in memory. The results
+    of a row are yielded as soon as the row below it has been read.
+    """
+    empty: Row = ("", [])
+    previous, current = empty, None
+    for line in lines:
+        row = _scan_row(line.rstrip("\n"))
+        if current is not None:
+            yield from _row_results(previous, current, row)
+            previous = current
+        current = row
+
+    if current is not None:
+        yield from _row_results(previous, current, empty)
+
+
+def _scan_row(row: str) -> Row:
+    numbers = [
+        (*match.span(), int(match.group()))
+        for match in re.finditer(r"\d+", row)
+    ]
+    return row, numbers
+
+
+def _row_results(*window: Row) -> Iterator[tuple[str, int]]:
+    row, numbers = window[1]
+    for start, stop, number in numbers:
+        lower = max(start - 1, 0)
+        if any(_is_symbol(v) for r, _ in window for v in r[lower : stop + 1]):
+            yield "part", number
+
+    for j, value in enumerate(row):
+        if value != "*":
+            continue
+
+        adjacent = [
+            number
+            for _, numbers in window
+            for start, stop, number in numbers
+            if start <= j + 1 and stop >= j
+        ]
+        if len(adjacent) == 2:
+            yield "gear", adjacent[0] * adjacent[1]
+
+
 with open("inputs/test.txt", "r") as file:
     m = Matrix(file.read().splitlines())
 
+index = SymbolIndex.build(m)
+
 # Part 1
 
-parts = list(Part.parse(m))
-ids = [int(str(part)) for part in parts if part.is_valid()]
+ids = [number for number, symbols in index.parts() if symbols]
 print("Part 1")
 print("Valid Parts:", len(ids))
 print("Solution:", sum(ids))
 print()
 
-symbols: dict[tuple[int, int], Symbol] = {}
-for part in parts:
-    if (symbol := part.get_symbol_neighbor()) is None:
-        continue
-
-    coords = symbol.cell.astuple()
-    if coords in symbols:
-        symbols[coords] = symbols[coords] + symbol
-    else:
-        symbols[coords] = symbol
-
-ratios = [v.ratio for v in symbols.values() if v.is_gear()]
+ratios = list(index.gear_ratios())
 print("Part 2")
 print("Gears:", len(ratios))
 print("Solution:", sum(ratios))
+print()
+
+# Streaming
+results = defaultdict(int)
+with open("inputs/test.txt", "r") as file:
+    for kind, value in stream_schematic(file):
+        results[kind] += value
+print("Streaming")
+print("Solutions:", results["part"], results["gear"])
@@ -1,22 +1,27 @@
 # %%
 from dataclasses import dataclass
+from functools import reduce
+from typing import Iterable
+import operator
 
 
 @dataclass
 class Card:
+    """Scratchcard with its numbers packed into bitmasks (bit n = number n)."""
+
     id: int
-    winners: set[int]
-    numbers: set[int]
+    winners: int
+    numbers: int
 
     @property
     def points(self) -> int:
-        return int(2 ** (len(self.winning()) - 1))
+        return int(2 ** (self.n_winning() - 1))
 
-    def winning(self) -> set[int]:
-        return self.winners.intersection(self.numbers)
+    def winning(self) -> int:
+        return self.winners & self.numbers
 
     def n_winning(self) -> int:
-        return len(self.winning())
+        return self.winning().bit_count()
 
     @classmethod
     def parse(cls, input: str) -> "Card":
@@ -24,13 +29,45 @@ class Card:
         id = int(id.split(" ")[-1])
 
         winners, numbers = [
-            {int(e) for e in s.split(" ") if e.strip()}
+            reduce(operator.or_, (1 << int(e) for e in s.split()), 0)
             for s in rest.split("|")
         ]
 
         return Card(id=id, winners=winners, numbers=numbers)
 
 
+def count_cards(cards: Iterable[Card], max_winning: int = 0) -> int:
+    """Counts all cards including the won copies in a single pass.
+
+    The copies won by a card are added to the next cards as a range update
+    on a difference array, kept in a ring buffer sized to the maximum
+    number of winning numbers seen so far. `max_winning` only presizes it,
+    the buffer doubles whenever a card wins more.
+    """
+    size = max_winning + 2
+    diffs = [0] * size
+    total = running = 0
+    for i, card in enumerate(cards):
+        running += diffs[i % size]
+        diffs[i % size] = 0
+
+        copies = running + 1
+        total += copies
+        if not (n_winning := card.n_winning()):
+            continue
+
+        if n_winning + 2 > size:
+            grown = [0] * max(n_winning + 2, 2 * size)
+            for offset in range(size):
+                grown[(i + offset) % len(grown)] = diffs[(i + offset) % size]
+            diffs, size = grown, len(grown)
+
+        diffs[(i + 1) % size] += copies
+        diffs[(i + n_winning + 1) % size] -= copies
+
+    return total
+
+
 with open("inputs/test.txt", "r") as file:
     cards = [Card.parse(line) for line in file.read().splitlines()]
 
@@ -42,9 +79,5 @@ print("Answer:", points)
 
 
 print("Part 2")
-copies = {card.id: 1 for card in cards}
-for card in cards:
-    n_winning = card.n_winning()
-    for id in range(card.id + 1, card.id + n_winning + 1):
-        copies[id] += copies[card.id]
-print("Answer:", sum(copies.values()))
+with open("inputs/test.txt", "r") as file:
+    print("Answer:", count_cards(Card.parse(line) for line in file))
@@ -1,8 +1,13 @@
 # %%
 from dataclasses import dataclass
 from typing import Optional
+from bisect import bisect_right
+import numpy as np
 from tqdm import tqdm
-from joblib import Parallel, delayed
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+import os
 from tqdm import tqdm
 
 
@@ -44,6 +49,70 @@ class Map:
                 return output
         return value
 
+    def convert_range(self, start: int, end: int) -> list[tuple[int, int]]:
+        """Converts the half-open interval [start, end) as a whole.
+
+        The interval is split at the entry boundaries, parts not covered by
+        any entry are passed through unchanged.
+        """
+        ranges = []
+        for entry in self.sorted_entries():
+            if start >= end:
+                break
+
+            entry_end = entry.source + entry.range
+            if entry_end <= start or entry.source >= end:
+                continue
+
+            if start < entry.source:
+                ranges.append((start, entry.source))
+                start = entry.source
+
+            stop = min(end, entry_end)
+            ranges.append((entry.map(start), entry.map(stop - 1) + 1))
+            start = stop
+
+        if start < end:
+            ranges.append((start, end))
+
+        return ranges
+
+    def sorted_entries(self, reverse: bool = False) -> list[Entry]:
+        """Returns the non-identity entries sorted by source (destination).
+
+        Identity entries (e.g. the one added by `generate_entries`) may
+        overlap real entries and are equivalent to the unmapped fallback.
+        """
+        return sorted(
+            [e for e in self.entries if e.source != e.destination],
+            key=lambda e: e.destination if reverse else e.source,
+        )
+
+    def convert_ranges(
+        self, ranges: list[tuple[int, int]]
+    ) -> list[tuple[int, int]]:
+        return [
+            converted
+            for start, end in ranges
+            for converted in self.convert_range(start, end)
+        ]
+
+    def convert_array(self, values: np.ndarray) -> np.ndarray:
+        entries = self.sorted_entries()
+        if not entries:
+            return values.copy()
+
+        sources = np.array([e.source for e in entries], dtype=np.int64)
+        ends = sources + np.array([e.range for e in entries], dtype=np.int64)
+        offsets = (
+            np.array([e.destination for e in entries], dtype=np.int64)
+            - sources
+        )
+
+        index = np.maximum(np.searchsorted(sources, values, "right") - 1, 0)
+        inside = (values >= sources[index]) & (values < ends[index])
+        return np.where(inside, values + offsets[index], values)
+
     @classmethod
     def parse(cls, block: str):
         name, *entries = block.splitlines()
@@ -59,6 +128,67 @@ class Map:
         return entries
 
 
+@dataclass
+class PiecewiseMap:
+    """Chain of maps compiled to sorted breakpoints with constant offsets.
+
+    Piece `i` maps every value in [starts[i], starts[i + 1]) to
+    `value + offsets[i]`, the last piece is unbounded.
+    """
+
+    starts: list[int]
+    offsets: list[int]
+
+    def convert(self, value: int) -> int:
+        return value + self.offsets[bisect_right(self.starts, value) - 1]
+
+    def then(self, other: "PiecewiseMap") -> "PiecewiseMap":
+        starts, offsets = [], []
+        bounds = [*self.starts[1:], None]
+        for start, end, offset in zip(self.starts, bounds, self.offsets):
+            index = bisect_right(other.starts, start + offset) - 1
+            while True:
+                piece_start = max(start, other.starts[index] - offset)
+                piece_offset = offset + other.offsets[index]
+                if not offsets or offsets[-1] != piece_offset:
+                    starts.append(piece_start)
+                    offsets.append(piece_offset)
+
+                index += 1
+                if index == len(other.starts):
+                    break
+                if end is not None and other.starts[index] - offset >= end:
+                    break
+
+        return PiecewiseMap(starts, offsets)
+
+    @classmethod
+    def from_map(cls, map: Map, reverse: bool = False) -> "PiecewiseMap":
+        starts, offsets = [0], [0]
+        for entry in map.sorted_entries(reverse=reverse):
+            start, target = entry.source, entry.destination
+            if reverse:
+                start, target = target, start
+
+            if starts[-1] != start:
+                starts.append(start)
+                offsets.append(target - start)
+            else:
+                offsets[-1] = target - start
+
+            starts.append(start + entry.range)
+            offsets.append(0)
+
+        return PiecewiseMap(starts, offsets)
+
+    @classmethod
+    def compile(cls, maps: list[Map], reverse: bool = False):
+        compiled = PiecewiseMap([0], [0])
+        for map in maps[::-1] if reverse else maps:
+            compiled = compiled.then(cls.from_map(map, reverse=reverse))
+        return compiled
+
+
 @dataclass
 class RangeSeed:
     value: int
@@ -68,6 +198,82 @@ class RangeSeed:
         return self.value <= value < self.value + self.range
 
 
+_search_state: dict = {}
+
+
+def _init_search_worker(maps: list[Map], seeds: list[RangeSeed]):
+    _search_state["inverse"] = PiecewiseMap.compile(maps, reverse=True)
+    _search_state["seeds"] = seeds
+
+
+def _search_chunk(start: int, stop: int) -> Optional[tuple[int, RangeSeed]]:
+    inverse, seeds = _search_state["inverse"], _search_state["seeds"]
+    for location in range(start, stop):
+        possible_seed = inverse.convert(location)
+        for seed in seeds:
+            if seed.contains(possible_seed):
+                return location, seed
+    return None
+
+
+class ChunkedSearch:
+    """Searches locations for the first one that resolves to a seed.
+
+    The locations are split into contiguous chunks which are evaluated in
+    location order on a process pool. Workers receive the maps and seeds
+    once at startup, outstanding chunks are cancelled after the first hit.
+    """
+
+    def __init__(
+        self,
+        maps: list[Map],
+        seeds: list[RangeSeed],
+        *,
+        chunk_size: int = 100_000,
+        max_workers: Optional[int] = None,
+    ):
+        max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.window = 2 * max_workers
+        self.executor = ProcessPoolExecutor(
+            max_workers,
+            initializer=_init_search_worker,
+            initargs=(maps, seeds),
+        )
+
+    def search(self, locations: range) -> Optional[tuple[int, RangeSeed]]:
+        starts = range(locations.start, locations.stop, self.chunk_size)
+        pending: deque[Future] = deque()
+        try:
+            for start in starts:
+                stop = min(start + self.chunk_size, locations.stop)
+                future = self.executor.submit(_search_chunk, start, stop)
+                pending.append(future)
+                if len(pending) < self.window:
+                    continue
+
+                if (result := pending.popleft().result()) is not None:
+                    return result
+
+            while pending:
+                if (result := pending.popleft().result()) is not None:
+                    return result
+        finally:
+            for future in pending:
+                future.cancel()
+
+        return None
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> "ChunkedSearch":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
 class Solver:
     @staticmethod
     def resolve(seed: int, maps: list[Map], verbose: bool = False):
@@ -82,6 +288,13 @@ class Solver:
 
         return value
 
+    @staticmethod
+    def resolve_array(seeds: np.ndarray, maps: list[Map]) -> np.ndarray:
+        values = np.asarray(seeds, dtype=np.int64)
+        for map in maps:
+            values = map.convert_array(values)
+        return values
+
     @staticmethod
     def reverse_resolve(location: int, maps: list[Map], verbose: bool = False):
         if verbose:
@@ -95,6 +308,30 @@ class Solver:
 
         return value
 
+    @staticmethod
+    def range_search(
+        seeds: list[RangeSeed],
+        maps: list[Map],
+        verbose: bool = False,
+    ) -> Optional[tuple[RangeSeed, int]]:
+        best = None
+        for seed in seeds:
+            ranges = [(seed.value, seed.value + seed.range)]
+            for map in maps:
+                ranges = map.convert_ranges(ranges)
+
+            if not ranges:
+                continue
+
+            location = min(start for start, _ in ranges)
+            if verbose:
+                print(f"Seed '{seed}' reaches location '{location}'.")
+
+            if best is None or location < best[1]:
+                best = (seed, location)
+
+        return best
+
     @staticmethod
     def reverse_search(
         seeds: list[RangeSeed],
@@ -102,40 +339,20 @@ class Solver:
         verbose: bool = True,
     ) -> Optional[int]:
         sorted_entries = sorted(maps[-1].entries, key=lambda e: e.destination)
-        for entry in tqdm(sorted_entries, "Entries"):
-            if verbose:
-                print(f"Searching {entry.range} from {entry.destination}.")
-
-            possible_locations = range(
-                entry.destination,
-                entry.destination + entry.range,
-            )
-
-            possible_seeds = Parallel()(
-                delayed(Solver._reverse_search_location)(location, maps)
-                for location in tqdm(possible_locations, position=1)
-            )
-
-            location, seed = next(
-                (
-                    (location, seed)
-                    for (location, seed) in possible_seeds
-                    if seed is not None
-                ),
-                (None, None),
-            )
-
-            if seed is not None:
-                return seed, location
+        with ChunkedSearch(maps, seeds) as search:
+            for entry in tqdm(sorted_entries, "Entries"):
+                if verbose:
+                    print(f"Searching {entry.range} from {entry.destination}.")
 
-    @staticmethod
-    def _reverse_search_location(location: int, maps: list[Map]):
-        possible_seed = Solver.reverse_resolve(location, maps)
-        for seed in seeds:
-            if seed.contains(possible_seed):
-                print(f"Matched seed '{seed}' to location '{location}'.")
-                return location, seed
-        return (location, None)
+                possible_locations = range(
+                    entry.destination,
+                    entry.destination + entry.range,
+                )
+
+                if (result := search.search(possible_locations)) is not None:
+                    location, seed = result
+                    print(f"Matched seed '{seed}' to location '{location}'.")
+                    return seed, location
 
 
 with open("inputs/test.txt") as file:
@@ -145,16 +362,16 @@ seeds, *blocks = lines.split("\n\n")
 seeds = list(map(int, seeds.split(" ")[1:]))
 maps = [Map.parse(block) for block in blocks]
 
-locations = [Solver.resolve(seed, maps, verbose=False) for seed in seeds]
+locations = Solver.resolve_array(np.array(seeds, dtype=np.int64), maps)
 
 
 # %%
 # Part 1
 print("Part 1")
-print("Answer:", min(locations))
+print("Answer:", locations.min())
 
 # Part 2
 print("Part 2")
 seeds = [RangeSeed(s, r) for s, r in list(zip(seeds[0::2], seeds[1::2]))]
-Solver.reverse_search(seeds, maps)
-# Still takes like 15mins to find the correct seed :/
+seed, location = Solver.range_search(seeds, maps)
+print("Answer:", location)
@@ -1,6 +1,6 @@
 # %%
 from dataclasses import dataclass
-from typing import Iterator
+from typing import Iterator, Iterable, Optional
 import re
 from functools import reduce
 import operator
@@ -14,24 +14,54 @@ class Race:
     acceleration: int = 1
 
     def get_winning(self):
-        min, max = self.solve_distance()
+        return self.count_winning()
+
+    def count_winning(self, threshold: Optional[int] = None) -> int:
+        if (bounds := self.solve_distance(threshold)) is None:
+            return 0
+
+        min, max = bounds
         return max - min + 1
 
-    def get_strategies(self, threshold: int = 0) -> list[tuple[int, int]]:
-        return [
-            (t, distance)
-            for t in range(self.time)
-            if (distance := self.f_distance(t)) > threshold
-        ]
+    def get_strategies(self, threshold: int = 0) -> Iterator[tuple[int, int]]:
+        if (bounds := self.solve_distance(threshold)) is None:
+            return
+
+        min, max = bounds
+        for t in range(min, max + 1):
+            yield t, self.f_distance(t)
 
     def f_distance(self, t: int) -> int:
         return (self.time - t) * t
 
-    def solve_distance(self):
-        a = self.time / 2
-        b = math.sqrt((self.time / 2) ** 2 - self.distance)
-        eps = 1e-8
-        return math.ceil(a - b + eps), math.floor(a + b - eps)
+    def solve_distance(
+        self, threshold: Optional[int] = None
+    ) -> Optional[tuple[int, int]]:
+        """Returns the first and last t beating the threshold, if any.
+
+        Solves (time - t) * t > threshold exactly with integer square roots.
+        """
+        threshold = self.distance if threshold is None else threshold
+        discriminant = self.time**2 - 4 * threshold
+        if discriminant < 0:
+            return None
+
+        lower = max(0, (self.time - math.isqrt(discriminant)) // 2)
+        while lower > 0 and self.f_distance(lower - 1) > threshold:
+            lower -= 1
+        while lower <= self.time // 2 and self.f_distance(lower) <= threshold:
+            lower += 1
+
+        if lower > self.time // 2:
+            return None
+
+        return lower, self.time - lower
+
+    @staticmethod
+    def count_all(
+        races: Iterable["Race"], threshold: Optional[int] = None
+    ) -> list[int]:
+        return [race.count_winning(threshold) for race in races]
 
     @classmethod
     def parse(cls, contents: str) -> Iterator["Race"]:
@@ -47,7 +77,7 @@ with open("inputs/test.txt") as file:
 
 # Part 1
 races = list(Race.parse(contents))
-winning = [race.get_winning() for race in races]
+winning = Race.count_all(races)
 print("Part 1")
 print("Answer:", reduce(operator.mul, winning))
 
@@ -2,10 +2,12 @@
 
 from dataclasses import dataclass
 from enum import Enum
-from functools import total_ordering, lru_cache
+from functools import total_ordering, lru_cache, reduce
 from typing import Literal, get_args, Any, Callable
 from collections import Counter
 import operator
+from operator import attrgetter
+import numpy as np
 
 CARDS = ("A", "K", "Q", "J", "T", "9", "8", "7", "6", "5", "4", "3", "2")
 CARDS_JOKER = ("A", "K", "Q", "T", "9", "8", "7", "6", "5", "4", "3", "2", "J")
@@ -22,6 +24,11 @@ class HandType(Enum):
 
     @classmethod
     def get(cls, cards: str):
+        return cls._classify("".join(sorted(cards)))
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _classify(cls, cards: str):
         if (n_cards := len(cards)) != 5:
             raise ValueError(f"Expected 5 cards, but got {n_cards}.")
 
@@ -50,13 +57,23 @@ class Hand:
         self.cards = cards
         self.bid = bid
 
+        # The type only depends on the multiset of cards.
+        multiset = "".join(sorted(cards))
         self.type = HandType.get(
-            cards if not with_joker else self._substitute_joker(cards)
+            multiset if not with_joker else self._substitute_joker(multiset)
         )
         CARD_ORDER = CARDS if not with_joker else CARDS_JOKER
         self.indexes = [CARD_ORDER.index(card) for card in cards]
+        # Type rank followed by the card indexes packed in base 13.
+        self.key = reduce(
+            lambda key, index: key * len(CARD_ORDER) + index,
+            self.indexes,
+            self.type.value,
+        )
 
-    def _substitute_joker(self, cards: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _substitute_joker(cards: str) -> str:
         counts = Counter(cards.replace("J", ""))
         if not counts:
             return "AAAAA"
@@ -68,13 +85,7 @@ class Hand:
             raise NotImplementedError()
 
     def _compare(self, other: "Hand", op: Callable[[Any, Any], bool]):
-        if self.type != other.type:
-            return op(self.type.value, other.type.value)
-
-        for left, right in zip(self.indexes, other.indexes):
-            if left != right:
-                return op(left, right)
-        return False
+        return op(self.key, other.key)
 
     def __gt__(self, other: Any) -> bool:
         self._valid_operator(other)
@@ -100,18 +111,107 @@ class Hand:
         return Hand(cards=cards, bid=int(bid), with_joker=with_joker)
 
 
+@dataclass
+class HandTable:
+    """Columnar hands for ranking many hands at once with NumPy.
+
+    `indexes` holds the (N, 5) card indexes into `CARDS`/`CARDS_JOKER`,
+    `types` the `HandType` values and `bids` the bids of all hands.
+    """
+
+    indexes: np.ndarray
+    types: np.ndarray
+    bids: np.ndarray
+
+    def total_winnings(self) -> int:
+        # Weakest hand first, i.e. descending type value and indexes.
+        order = np.lexsort((*self.indexes.T[::-1], self.types))[::-1]
+        ranks = np.arange(1, len(order) + 1, dtype=np.int64)
+        return int(self.bids[order] @ ranks)
+
+    @staticmethod
+    def classify(indexes: np.ndarray, with_joker: bool = False) -> np.ndarray:
+        n_cards = len(CARDS)
+        counts = (indexes[:, :, None] == np.arange(n_cards)).sum(axis=1)
+
+        if with_joker:
+            joker = CARDS_JOKER.index("J")
+            jokers = counts[:, joker].copy()
+            counts[:, joker] = 0
+            best = counts.argmax(axis=1)
+            counts[np.arange(len(counts)), best] += jokers
+
+        n_distinct = (counts > 0).sum(axis=1)
+        n_max = counts.max(axis=1)
+        return np.select(
+            [
+                n_distinct == 1,
+                (n_distinct == 2) & (n_max == 4),
+                n_distinct == 2,
+                (n_distinct == 3) & (n_max == 3),
+                n_distinct == 3,
+                n_distinct == 4,
+            ],
+            [
+                HandType.FiveKind.value,
+                HandType.FourKind.value,
+                HandType.FullHouse.value,
+                HandType.ThreeKind.value,
+                HandType.TwoPair.value,
+                HandType.OnePair.value,
+            ],
+            HandType.High.value,
+        )
+
+    @classmethod
+    def parse(cls, lines: list[str], with_joker: bool = False) -> "HandTable":
+        cards, bids = zip(*(line.split(" ") for line in lines))
+        if any(len(card) != 5 for card in cards):
+            raise ValueError("Expected 5 cards for every hand.")
+
+        # Unknown cards map to the sentinel 255.
+        lookup = np.full(256, 255, dtype=np.uint8)
+        for index, card in enumerate(CARDS if not with_joker else CARDS_JOKER):
+            lookup[ord(card)] = index
+
+        buffer = np.frombuffer("".join(cards).encode(), dtype=np.uint8)
+        if buffer.size != 5 * len(cards):
+            raise ValueError("Expected 5 ASCII cards for every hand.")
+
+        indexes = lookup[buffer].reshape(-1, 5)
+        if (invalid := np.flatnonzero((indexes == 255).any(axis=1))).size:
+            raise ValueError(f"Invalid Hand '{cards[invalid[0]]}'.")
+
+        return HandTable(
+            indexes=indexes,
+            types=cls.classify(indexes, with_joker=with_joker),
+            bids=np.array(bids, dtype=np.int64),
+        )
+
+
 with open("inputs/test.txt") as file:
     lines = file.read().splitlines()
 
 
+answers = []
+
 print("Part 1")
 hands = [Hand.parse(line) for line in lines]
-sorted_hands = sorted(hands, reverse=True)
+sorted_hands = sorted(hands, key=attrgetter("key"), reverse=True)
 winnings = [hand.bid * rank for rank, hand in enumerate(sorted_hands, 1)]
+answers.append(sum(winnings))
 print("Answer:", sum(winnings))
 
 print("Part 2")
 hands = [Hand.parse(line, with_joker=True) for line in lines]
-sorted_hands = sorted(hands, reverse=True)
+sorted_hands = sorted(hands, key=attrgetter("key"), reverse=True)
 winnings = [hand.bid * rank for rank, hand in enumerate(sorted_hands, 1)]
+answers.append(sum(winnings))
 print("Answer:", sum(winnings))
+
+print("Batch")
+for with_joker, answer in zip([False, True], answers):
+    table = HandTable.parse(lines, with_joker=with_joker)
+    if (batch_answer := table.total_winnings()) != answer:
+        raise ValueError(f"Batch answer {batch_answer} != {answer}.")
+    print("Answer:", batch_answer)
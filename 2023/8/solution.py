@@ -1,6 +1,9 @@
 # %%
 from math import gcd
 from functools import reduce
+from typing import Optional
+from dataclasses import dataclass
+import numpy as np
 
 
 def lcm(a, b):
@@ -20,6 +23,85 @@ def parse(contents: str) -> tuple[dict[str, tuple[str, str]], str]:
     return nodes, directions
 
 
+class JumpTable:
+    """Network compiled to integer node ids with pass-level jump tables.
+
+    `jumps[p][node]` is the node reached after 2**p full passes over the
+    directions and `hits[p][node]` whether a stop node is reached within
+    them. `first_hit[node]` is the first step of a pass reaching a stop node.
+    """
+
+    DIRECTIONS = {"L": 0, "R": 1}
+
+    def __init__(
+        self,
+        nodes: dict[str, tuple[str, str]],
+        directions: str,
+        *,
+        stop: str = "ZZZ",
+    ):
+        self.names = list(nodes)
+        self.ids = {name: id for id, name in enumerate(self.names)}
+        self.directions = directions
+        self.graph = [
+            tuple(self.ids[child] for child in nodes[name])
+            for name in self.names
+        ]
+
+        is_stop = [name.endswith(stop) for name in self.names]
+        current = list(range(len(self.names)))
+        self.first_hit: list[Optional[int]] = [None] * len(self.names)
+        for step, direction in enumerate(directions, 1):
+            side = self.DIRECTIONS[direction]
+            current = [self.graph[node][side] for node in current]
+            for start, node in enumerate(current):
+                if is_stop[node] and self.first_hit[start] is None:
+                    self.first_hit[start] = step
+
+        self.jumps = [current]
+        self.hits = [[hit is not None for hit in self.first_hit]]
+        # Without a hit within len(nodes) passes there is none at all.
+        while (1 << len(self.jumps)) <= len(self.names):
+            self._extend()
+
+    def _extend(self):
+        jump, hit = self.jumps[-1], self.hits[-1]
+        self.jumps.append([jump[node] for node in jump])
+        self.hits.append(
+            [hit[node] or hit[jump[node]] for node in range(len(jump))]
+        )
+
+    def _step(self, node: int, index: int) -> int:
+        return self.graph[node][self.DIRECTIONS[self.directions[index]]]
+
+    def position(self, start: str, k: int) -> str:
+        """Returns the node after `k` steps in O(log(k / L) + L)."""
+        passes, rest = divmod(k, len(self.directions))
+        node = self.ids[start]
+        for p in range(passes.bit_length()):
+            if (passes >> p) & 1:
+                while p >= len(self.jumps):
+                    self._extend()
+                node = self.jumps[p][node]
+
+        for index in range(rest):
+            node = self._step(node, index)
+        return self.names[node]
+
+    def solve(self, start: str) -> int:
+        """Returns the steps until a stop node is reached from `start`."""
+        node, passes = self.ids[start], 0
+        for p in range(len(self.jumps) - 1, -1, -1):
+            if not self.hits[p][node]:
+                node = self.jumps[p][node]
+                passes += 1 << p
+
+        if self.first_hit[node] is None:
+            raise ValueError(f"No stop node is reachable from '{start}'.")
+
+        return passes * len(self.directions) + self.first_hit[node]
+
+
 def solve(
     nodes: dict[str, str],
     directions: str,
@@ -27,19 +109,123 @@ def solve(
     start: str = "AAA",
     stop: str = "ZZZ",
 ):
-    index = 0
-    steps_taken = 0
-    node = start
-    DIRECTIONS = {"L": 0, "R": 1}
-    while 1:
-        steps_taken += 1
-        node = nodes[node][DIRECTIONS[directions[index]]]
-        index = (index + 1) % len(directions)
+    return JumpTable(nodes, directions, stop=stop).solve(start)
+
+
+@dataclass
+class GhostCycle:
+    """Steps at which a ghost is on a stop node.
 
-        if node.endswith(stop):
-            break
+    After `offset` steps the ghost repeats every `period` steps, `hits` are
+    the stop steps in (offset, offset + period] and `early` the stop steps
+    up to `offset`.
+    """
 
-    return steps_taken
+    offset: int
+    period: int
+    hits: list[int]
+    early: list[int]
+
+    def is_hit(self, step: int) -> bool:
+        if step <= self.offset:
+            return step in self.early
+        rest = (step - self.offset - 1) % self.period
+        return self.offset + rest + 1 in self.hits
+
+
+def crt(a1: int, m1: int, a2: int, m2: int) -> Optional[tuple[int, int]]:
+    """Solves x = a1 (mod m1), x = a2 (mod m2) for non-coprime moduli."""
+    g = gcd(m1, m2)
+    if (a2 - a1) % g:
+        return None
+
+    k = (a2 - a1) // g * pow(m1 // g, -1, m2 // g) % (m2 // g)
+    m = m1 // g * m2
+    return (a1 + m1 * k) % m, m
+
+
+def analyse_ghosts(
+    nodes: dict[str, tuple[str, str]],
+    directions: str,
+    starts: list[str],
+    *,
+    stop: str = "Z",
+) -> list[GhostCycle]:
+    """Advances all ghosts together until each one has entered its cycle.
+
+    The state of a ghost is its node and direction index, so every cycle
+    passes through index 0 and repeats are detected at pass boundaries.
+    """
+    ids = {name: id for id, name in enumerate(nodes)}
+    graph = np.array(
+        [[ids[left], ids[right]] for left, right in nodes.values()],
+        dtype=np.int64,
+    )
+    is_stop = np.array([name.endswith(stop) for name in nodes])
+    sides = [JumpTable.DIRECTIONS[direction] for direction in directions]
+
+    n_ghosts = len(starts)
+    current = np.array([ids[start] for start in starts], dtype=np.int64)
+    seen = np.full((n_ghosts, len(nodes)), -1, dtype=np.int64)
+    seen[np.arange(n_ghosts), current] = 0
+    active = np.ones(n_ghosts, dtype=bool)
+    hits: list[list[int]] = [[] for _ in starts]
+    cycles: list[Optional[tuple[int, int]]] = [None] * n_ghosts
+
+    step = 0
+    while active.any():
+        for side in sides:
+            current = graph[current, side]
+            step += 1
+            for ghost in np.flatnonzero(is_stop[current] & active):
+                hits[ghost].append(step)
+
+        boundary = seen[np.arange(n_ghosts), current]
+        for ghost in np.flatnonzero(active & (boundary >= 0)):
+            cycles[ghost] = (int(boundary[ghost]), step)
+            active[ghost] = False
+        seen[np.arange(n_ghosts), current] = np.where(active, step, boundary)
+
+    ghosts = []
+    for (offset, end), ghost_hits in zip(cycles, hits):
+        ghosts.append(
+            GhostCycle(
+                offset=offset,
+                period=end - offset,
+                hits=[hit for hit in ghost_hits if hit > offset],
+                early=[hit for hit in ghost_hits if hit <= offset],
+            )
+        )
+    return ghosts
+
+
+def sync_steps(ghosts: list[GhostCycle]) -> Optional[int]:
+    """Returns the first step at which all ghosts are on stop nodes."""
+    candidates = [
+        step
+        for ghost in ghosts
+        for step in ghost.early
+        if all(other.is_hit(step) for other in ghosts)
+    ]
+
+    # Fold in one ghost at a time, keeping the distinct residues modulo the
+    # combined period that are stop steps for all ghosts so far.
+    residues, modulus = {0}, 1
+    for ghost in ghosts:
+        combined = set()
+        for x in residues:
+            for hit in ghost.hits:
+                solution = crt(x, modulus, hit % ghost.period, ghost.period)
+                if solution is not None:
+                    combined.add(solution[0])
+        residues, modulus = combined, lcm(modulus, ghost.period)
+
+    # Smallest step past all offsets that solves the congruences.
+    offset = max(ghost.offset for ghost in ghosts)
+    for x in residues:
+        candidates.append(x + max(0, (offset - x) // modulus + 1) * modulus)
+
+    return min(candidates, default=None)
 
 
 with open("inputs/test.txt") as file:
@@ -51,7 +237,7 @@ print("Answer:", solve(nodes, directions))
 
 print("Part 2")
 start_nodes = [node for node in nodes if node.endswith("A")]
-steps = [
-    solve(nodes, directions, start=node, stop="Z") for node in start_nodes
-]
+table = JumpTable(nodes, directions, stop="Z")
+steps = [table.solve(node) for node in start_nodes]
 print("Answer:", reduce(lcm, steps, 1))
+print("Answer:", sync_steps(analyse_ghosts(nodes, directions, start_nodes)))
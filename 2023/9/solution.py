@@ -1,7 +1,11 @@
 # %%
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Optional
 from itertools import pairwise
-from functools import reduce
+from functools import reduce, lru_cache
+from collections import defaultdict
+from math import comb
+import numpy as np
 
 
 @dataclass
@@ -33,6 +37,90 @@ class Series:
         return Series([int(n) for n in line.split(" ")])
 
 
+@dataclass
+class StreamingSeries:
+    """Series extrapolated incrementally while values are appended.
+
+    Only the last (and first) element of every difference row is kept, so
+    an append costs O(depth). Rows that are identically zero so far stay
+    implicit and are only added once they get a non-zero element, so the
+    depth follows the degree of the series rather than its length. With
+    `max_depth` the differences below that depth are assumed to be zero.
+    """
+
+    max_depth: Optional[int] = None
+    length: int = 0
+    lasts: list[int] = field(default_factory=list)
+    firsts: list[int] = field(default_factory=list)
+
+    def append(self, value: int) -> int:
+        diff = value
+        for depth, last in enumerate(self.lasts):
+            self.lasts[depth], diff = diff, diff - last
+
+        # The implicit rows were all zeros, so a non-zero element carries
+        # down unchanged to the row that only starts with this value.
+        if diff:
+            for depth in range(len(self.lasts), self.length + 1):
+                if self.max_depth is not None and depth >= self.max_depth:
+                    break
+                self.lasts.append(diff)
+                self.firsts.append(diff if depth == self.length else 0)
+
+        self.length += 1
+        return self.extrapolate()
+
+    def extrapolate(self) -> int:
+        return sum(self.lasts)
+
+    def extrapolate_rev(self) -> int:
+        return sum(f if i % 2 == 0 else -f for i, f in enumerate(self.firsts))
+
+
+@lru_cache(maxsize=None)
+def binomial_weights(n: int) -> np.ndarray:
+    """Returns the (2, n) weights extrapolating n numbers forward/backward.
+
+    Following Newton's forward differences, the next number is
+    sum((-1) ** (n - 1 - k) * comb(n, k) * a[k]) and the previous one
+    sum((-1) ** k * comb(n, k + 1) * a[k]).
+    """
+    return np.array(
+        [
+            [(-1) ** (n - 1 - k) * comb(n, k) for k in range(n)],
+            [(-1) ** k * comb(n, k + 1) for k in range(n)],
+        ],
+        dtype=object,
+    )
+
+
+def extrapolate_batch(series: list[Series]) -> tuple[np.ndarray, np.ndarray]:
+    """Extrapolates all series forward and backward at once.
+
+    Series are grouped by length and each group is extrapolated with one
+    matrix product against the cached binomial weights.
+    """
+    groups: dict[int, list[int]] = defaultdict(list)
+    for index, s in enumerate(series):
+        groups[len(s.numbers)].append(index)
+
+    forward = np.zeros(len(series), dtype=object)
+    backward = np.zeros(len(series), dtype=object)
+    for n, indexes in groups.items():
+        numbers = np.array([series[i].numbers for i in indexes], dtype=object)
+        weights = binomial_weights(n)
+
+        # Stay in int64 unless the weighted sums could overflow.
+        bound = int(np.abs(numbers).max(initial=0)) * 2**n
+        if bound < 2**63:
+            numbers = numbers.astype(np.int64)
+            weights = weights.astype(np.int64)
+
+        forward[indexes], backward[indexes] = (numbers @ weights.T).T
+
+    return forward, backward
+
+
 with open("inputs/test.txt") as file:
     lines = file.read().splitlines()
 
@@ -46,3 +134,20 @@ print("Answer:", sum(extrapolated))
 extrapolated_rev = [s.extrapolate_rev() for s in series]
 print("Part 2")
 print("Answer:", sum(extrapolated_rev))
+
+forward, backward = extrapolate_batch(series)
+print("Batch")
+print("Answer:", sum(forward), sum(backward))
+
+streams = []
+for s in series:
+    stream = StreamingSeries()
+    for number in s.numbers:
+        stream.append(number)
+    streams.append(stream)
+print("Streaming")
+print(
+    "Answer:",
+    sum(s.extrapolate() for s in streams),
+    sum(s.extrapolate_rev() for s in streams),
+)
@@ -2,43 +2,203 @@
 
 # Input parsing
 
+import numpy as np
+
 path = 'inputs/test.txt'
 
-with open(path, 'r') as file:
-    contents = file.readlines()
 
-left, right = list(map(list, zip(*[line.split() for line in contents])))
-sorted_left, sorted_right = sorted(left), sorted(right)
+def load_columns(path: str) -> tuple[np.ndarray, np.ndarray]:
+    with open(path, 'r') as file:
+        values = np.fromstring(file.read(), dtype=np.int64, sep=' ')
+
+    left, right = values.reshape(-1, 2).T
+    return np.sort(left), np.sort(right)
+
+
+sorted_left, sorted_right = load_columns(path)
 
 # %%
 ## Task 1
 
-diffs = [abs(int(l) - int(r)) for l, r in zip(sorted_left, sorted_right)]
-print('Result: ', sum(diffs))
+diffs = np.abs(sorted_left - sorted_right)
+print('Result: ', diffs.sum())
 
 # %%
 ## Task 2
 
 
-def count_items(items: list[str]) -> dict[str, int]:
-    counter: dict[str, int] = {}
-    for item in items:
-        count = counter.get(item, 0)
-        counter[item] = count + 1
-
-    return counter
+def calculate_similarity(left: np.ndarray, right: np.ndarray) -> int:
+    values, counts = np.unique(right, return_counts=True)
 
+    index = np.searchsorted(values, left).clip(max=len(values) - 1)
+    matches = values[index] == left
+    return int((left[matches] * counts[index[matches]]).sum())
 
-counter = count_items(right)
-
-
-def calculate_similarity(left: list[str], right: list[str]) -> int:
-    counter_left, counter_right = count_items(left), count_items(right)
-
-    return sum(
-        [int(k) * v * counter_right.get(k, 0) for k, v in counter_left.items()]
-    )
 
+similarity = calculate_similarity(sorted_left, sorted_right)
+print('Result: ', similarity)
 
-similarity = calculate_similarity(left, right)
+# %%
+## Out-of-core
+
+import os
+import tempfile
+from typing import Iterator
+
+# Peak bytes per byte of input text while spilling a run: the text itself
+# plus the parsed int64 pairs, up to 16 bytes per 4-byte line ("1 1\n"),
+# and the sorted copy of one column.
+SPILL_FACTOR = 8
+# Buffers per run while merging: the run block, its share of the merged
+# chunk and the sort buffer, for both columns at once.
+MERGE_FACTOR = 8
+
+
+def spill_runs(
+    path: str, directory: str, memory_limit: int
+) -> tuple[list[str], list[str]]:
+    chunk_bytes = max(1, memory_limit // SPILL_FACTOR)
+    left_runs: list[str] = []
+    right_runs: list[str] = []
+
+    with open(path, 'rb') as file:
+        while chunk := file.read(chunk_bytes):
+            # Complete the last line so no row is split between runs.
+            chunk += file.readline()
+            values = np.fromstring(chunk, dtype=np.int64, sep=' ')
+            del chunk
+
+            for name, column, runs in [
+                ('left', values[0::2], left_runs),
+                ('right', values[1::2], right_runs),
+            ]:
+                run_path = os.path.join(directory, f'{name}_{len(runs)}.bin')
+                np.sort(column).tofile(run_path)
+                runs.append(run_path)
+
+    return left_runs, right_runs
+
+
+def read_run(path: str, block_size: int) -> Iterator[np.ndarray]:
+    with open(path, 'rb') as file:
+        while (block := np.fromfile(file, np.int64, block_size)).size:
+            yield block
+
+
+def merge_runs(paths: list[str], block_size: int) -> Iterator[np.ndarray]:
+    """K-way merges sorted runs into a stream of sorted array chunks.
+
+    Every chunk holds all buffered values up to the smallest last value of
+    the run blocks, so at least one block is used up per chunk.
+    """
+    readers = [read_run(path, block_size) for path in paths]
+    blocks = [next(reader, None) for reader in readers]
+
+    while live := [i for i, block in enumerate(blocks) if block is not None]:
+        bound = min(blocks[i][-1] for i in live)
+        parts = []
+        for i in live:
+            cut = np.searchsorted(blocks[i], bound, 'right')
+            parts.append(blocks[i][:cut])
+            rest = blocks[i][cut:]
+            blocks[i] = rest if rest.size else next(readers[i], None)
+
+        yield np.sort(np.concatenate(parts))
+
+
+def align_chunks(
+    left: Iterator[np.ndarray], right: Iterator[np.ndarray]
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    left_chunk = right_chunk = np.empty(0, dtype=np.int64)
+    while True:
+        if not left_chunk.size and (left_chunk := next(left, None)) is None:
+            return
+        if not right_chunk.size and (right_chunk := next(right, None)) is None:
+            return
+
+        n = min(left_chunk.size, right_chunk.size)
+        yield left_chunk[:n], right_chunk[:n]
+        left_chunk, right_chunk = left_chunk[n:], right_chunk[n:]
+
+
+def count_chunks(
+    chunks: Iterator[np.ndarray],
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Yields the run-length counts of sorted chunks.
+
+    The last value of a chunk is held back, so no value is split between
+    two yielded count chunks.
+    """
+    carry = None
+    for chunk in chunks:
+        values, counts = np.unique(chunk, return_counts=True)
+        if carry is not None:
+            if values[0] == carry[0][0]:
+                counts[0] += carry[1][0]
+            else:
+                yield carry
+
+        carry = values[-1:], counts[-1:]
+        if values.size > 1:
+            yield values[:-1], counts[:-1]
+
+    if carry is not None:
+        yield carry
+
+
+def similarity_from_chunks(
+    left: Iterator[np.ndarray], right: Iterator[np.ndarray]
+) -> int:
+    similarity = 0
+    right_counts = count_chunks(right)
+    right_values, right_count = next(right_counts, (None, None))
+
+    for left_values, left_count in count_chunks(left):
+        while right_values is not None:
+            index = np.searchsorted(right_values, left_values)
+            index = index.clip(max=right_values.size - 1)
+            matches = right_values[index] == left_values
+            similarity += int(
+                (
+                    left_values[matches]
+                    * left_count[matches]
+                    * right_count[index[matches]]
+                ).sum()
+            )
+
+            if right_values[-1] > left_values[-1]:
+                break
+            right_values, right_count = next(right_counts, (None, None))
+
+    return similarity
+
+
+def external_totals(path: str, memory_limit: int = 1 << 26) -> tuple[int, int]:
+    """Computes the distance and similarity without loading both columns.
+
+    Each column is sorted in runs sized from `memory_limit` and spilled to
+    temporary files, which are then k-way merged as sorted array chunks.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        left_runs, right_runs = spill_runs(path, directory, memory_limit)
+        n_runs = max(1, len(left_runs) + len(right_runs))
+        block_size = max(1, memory_limit // (8 * MERGE_FACTOR * n_runs))
+
+        distance = sum(
+            int(np.abs(left - right).sum())
+            for left, right in align_chunks(
+                merge_runs(left_runs, block_size),
+                merge_runs(right_runs, block_size),
+            )
+        )
+        similarity = similarity_from_chunks(
+            merge_runs(left_runs, block_size),
+            merge_runs(right_runs, block_size),
+        )
+
+    return distance, similarity
+
+
+distance, similarity = external_totals(path, memory_limit=1 << 12)
+print('Result: ', distance)
 print('Result: ', similarity)
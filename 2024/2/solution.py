@@ -53,31 +53,73 @@ def check_reports(reports: list[list[int]]) -> Iterator[bool]:
         yield result
 
 
+def is_safe_step(left: int, right: int, sign: int) -> bool:
+    return 1 <= (right - left) * sign <= 3
+
+
 def check_report(report: list[int], allow_remove: int = 1) -> bool:
-    prev = 0
-    for i, (left, right) in enumerate(pairwise(report)):
-        curr = left - right
-
-        check_signs = prev * curr < 0
-        check_diff = abs(curr) < 1 or abs(curr) > 3
-
-        if check_signs or check_diff:
-            if not allow_remove:
-                return False
-
-            return (
-                (
-                    check_report(report[1:], allow_remove - 1)  # sign change
-                    if i == 1
-                    else False
-                )
-                or check_report(report[:i] + report[i + 1 :], allow_remove - 1)
-                or check_report(
-                    report[: i + 1] + report[i + 2 :], allow_remove - 1
-                )
-            )
-        prev = curr
-    return True
+    if len(report) <= allow_remove + 1:
+        return True
+
+    checker = check_single if allow_remove <= 1 else check_removals
+    return any(checker(report, allow_remove, sign) for sign in (1, -1))
+
+
+def check_single(report: list[int], allow_remove: int, sign: int) -> bool:
+    n = len(report)
+
+    # prefix[i]: report[: i + 1] is safe, suffix[i]: report[i:] is safe
+    prefix = [True] * n
+    for i in range(1, n):
+        prefix[i] = prefix[i - 1] and is_safe_step(
+            report[i - 1], report[i], sign
+        )
+
+    suffix = [True] * n
+    for i in range(n - 2, -1, -1):
+        suffix[i] = suffix[i + 1] and is_safe_step(
+            report[i], report[i + 1], sign
+        )
+
+    if prefix[-1] or not allow_remove:
+        return prefix[-1]
+
+    return (
+        suffix[1]
+        or prefix[-2]
+        or any(
+            prefix[i - 1]
+            and suffix[i + 1]
+            and is_safe_step(report[i - 1], report[i + 1], sign)
+            for i in range(1, n - 1)
+        )
+    )
+
+
+def check_removals(report: list[int], allow_remove: int, sign: int) -> bool:
+    n = len(report)
+
+    # kept[i][r]: report[i] can be the last kept level after r removals
+    kept = [[False] * (allow_remove + 1) for _ in range(n)]
+    for i in range(n):
+        if i <= allow_remove:
+            kept[i][i] = True
+
+        for j in range(max(0, i - allow_remove - 1), i):
+            if not is_safe_step(report[j], report[i], sign):
+                continue
+
+            skipped = i - j - 1
+            for r in range(allow_remove - skipped + 1):
+                if kept[j][r]:
+                    kept[i][r + skipped] = True
+
+    return any(
+        kept[i][r]
+        for i in range(n)
+        for r in range(allow_remove + 1)
+        if r + n - 1 - i <= allow_remove
+    )
 
 
 result = list(check_reports(reports))